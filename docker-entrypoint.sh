@@ -10,6 +10,14 @@ case "$1" in
     shift
     exec Rscript /app/Main_Survival.R "$@"
     ;;
+  batch)
+    shift
+    exec Rscript /app/Main_Batch.R "$@"
+    ;;
+  worker)
+    shift
+    exec Rscript /app/R_Worker.R "$@"
+    ;;
   --help|"")
     echo "PROMISE - PROgnostic Marker Identification and Survival Evaluation"
     echo ""
@@ -20,6 +28,8 @@ case "$1" in
     echo "Commands:"
     echo "  binary     Run binary classification (logistic regression)"
     echo "  survival   Run survival analysis (Cox proportional hazards)"
+    echo "  batch      Run several configs in one R session (--config <file|glob> ...)"
+    echo "  worker     Start a long-lived R worker (--port 6390 --jobs 2)"
     echo ""
     echo "Options:"
     echo "  --config=<path>  Path to YAML config file (use /work/ prefix for mounted files)"
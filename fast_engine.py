@@ -0,0 +1,721 @@
+"""
+NumPy engine for binary analyses, for quick interactive runs from the Streamlit app.
+
+Runs the same selection as Main_Binary.R / Binary_TrainAUC_StepwiseSelection.R: a univariate
+logistic screen over repeated stratified train/test splits with a frequency cutoff, then
+forward/backward stepwise selection on mean train AUC. Logistic models are fitted with batched
+IRLS (every candidate of a step at once), AUCs are rank based, and seeds are spread over all
+cores. Outputs use the R layout: StepBin/Final_Stepwise_Total.csv, Intermediate_*.csv,
+ExtBinCandidat/Logistic_*.csv, auc_iterations.csv and run_metrics.json. The log uses the same
+STEPWISE_LOG lines and JSON progress events on stderr.
+
+Splits come from NumPy's RNG, not R's, so they are not seed-compatible with the R engine: the same
+seeds give different partitions and can select different genes. R stays the reference engine and
+is still needed for the plots.
+
+Usage: python3 fast_engine.py --config config.yaml   (reads the binary: section)
+"""
+
+import argparse
+import json
+import math
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+MAX_IRLS_ITER = 25  # glm.control() default maxit
+IRLS_TOL = 1e-8
+SCREEN_CHUNK = 2000  # genes per batched univariate fit
+UNSUPPORTED_OPTIONS = (
+    "max_candidates_per_step",
+    "prescreen_seeds",
+    "prescreen_mode",
+    "collapse_correlation",
+)
+
+
+def log(message):
+    print(f"STEPWISE_LOG:{message}", file=sys.stderr, flush=True)
+
+
+# ---------------------------------------------------------------------------
+# Numerical kernels
+# ---------------------------------------------------------------------------
+
+
+def fit_logistic_batch(X, y, mask):
+    """Fit one logistic regression per leading index of X by batched IRLS.
+
+    X is (models, samples, coefficients) including the intercept column, mask (models, samples)
+    is 1 for rows a model uses (its complete cases). Returns the coefficients (models, coefficients).
+    """
+    n_models, _, n_coef = X.shape
+    beta = np.zeros((n_models, n_coef))
+    ridge = 1e-10 * np.eye(n_coef)
+    Xt = X.transpose(0, 2, 1)
+    for _ in range(MAX_IRLS_ITER):
+        eta = (X @ beta[..., None])[..., 0]
+        mu = 1.0 / (1.0 + np.exp(-np.clip(eta, -30, 30)))
+        weights = mask * mu * (1.0 - mu)
+        grad = (Xt @ (mask * (y - mu))[..., None])[..., 0]
+        info = Xt @ (X * weights[..., None]) + ridge
+        try:
+            step = np.linalg.solve(info, grad[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            # Aliased columns (e.g. a gene constant on a model's complete cases)
+            step = (np.linalg.pinv(info) @ grad[..., None])[..., 0]
+        beta += step
+        if not np.isfinite(step).all() or np.max(np.abs(step)) < IRLS_TOL:
+            break
+    return beta
+
+
+def fit_univariate_logistic(x, y):
+    """Intercept + slope logistic fit of y on every column of x at once (closed-form 2x2 IRLS).
+
+    Returns the slope estimates and their standard errors, as in summary(glm)$coef[2, 1:2].
+    """
+    b0 = np.zeros(x.shape[1])
+    b1 = np.zeros(x.shape[1])
+    y = y[:, None]
+    for _ in range(MAX_IRLS_ITER):
+        mu = 1.0 / (1.0 + np.exp(-np.clip(b0 + x * b1, -30, 30)))
+        w = mu * (1.0 - mu)
+        g0 = (y - mu).sum(axis=0)
+        g1 = (x * (y - mu)).sum(axis=0)
+        h00 = w.sum(axis=0)
+        h01 = (w * x).sum(axis=0)
+        h11 = (w * x * x).sum(axis=0)
+        det = h00 * h11 - h01 * h01
+        step0 = (h11 * g0 - h01 * g1) / det
+        step1 = (h00 * g1 - h01 * g0) / det
+        b0 += step0
+        b1 += step1
+        if np.nanmax(np.abs(np.concatenate([step0, step1])), initial=0.0) < IRLS_TOL:
+            break
+    mu = 1.0 / (1.0 + np.exp(-np.clip(b0 + x * b1, -30, 30)))
+    w = mu * (1.0 - mu)
+    h00 = w.sum(axis=0)
+    h01 = (w * x).sum(axis=0)
+    h11 = (w * x * x).sum(axis=0)
+    return b1, np.sqrt(h00 / (h00 * h11 - h01 * h01))
+
+
+def rank_auc(scores, labels):
+    """Mann-Whitney AUC with average ranks for ties; NaN when a class is missing."""
+    n_pos = labels.sum()
+    n_neg = len(labels) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return np.nan
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2.0)[inverse]
+    return (ranks[labels == 1].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg)
+
+
+def bootstrap_auc_ci(scores, labels, n_boot, conf_level, rng):
+    """Percentile CI of the rank AUC over n_boot resamples of stored predictions (no refits).
+
+    Replicates are drawn in chunks of about 1e6 cells and scored from per-score-group class
+    counts, so ties count 0.5 as in rank_auc.
+    """
+    n = len(scores)
+    _, grp = np.unique(scores, return_inverse=True)
+    n_groups = grp.max() + 1
+    positive = labels == 1
+    chunk = max(1, min(n_boot, 1_000_000 // n))
+    aucs = []
+    for start in range(0, n_boot, chunk):
+        b = min(chunk, n_boot - start)
+        idx = rng.integers(0, n, size=(b, n))
+        cell = (grp[idx] + n_groups * np.arange(b)[:, None]).ravel()
+        pos = positive[idx].ravel()
+        w1 = np.bincount(cell[pos], minlength=b * n_groups).reshape(b, n_groups)
+        w0 = np.bincount(cell[~pos], minlength=b * n_groups).reshape(b, n_groups)
+        below0 = np.cumsum(w0, axis=1) - w0
+        num = (w1 * (below0 + 0.5 * w0)).sum(axis=1)
+        den = w1.sum(axis=1) * w0.sum(axis=1)
+        aucs.append(np.where(den > 0, num / np.maximum(den, 1), np.nan))
+    tail = (1 - conf_level) / 2
+    return np.nanquantile(np.concatenate(aucs), [tail, 1 - tail])
+
+
+def p_adjust(p, method):
+    """R's p.adjust for the methods the configs use."""
+    p = np.asarray(p, dtype=float)
+    n = len(p)
+    if n == 0 or method == "none":
+        return p
+    if method == "bonferroni":
+        return np.minimum(p * n, 1.0)
+    if method == "holm":
+        order = np.argsort(p)
+        adjusted = np.maximum.accumulate((n - np.arange(n)) * p[order])
+        out = np.empty(n)
+        out[order] = np.minimum(adjusted, 1.0)
+        return out
+    if method in ("fdr", "BH"):
+        order = np.argsort(p)[::-1]
+        adjusted = np.minimum.accumulate(p[order] * n / np.arange(n, 0, -1))
+        out = np.empty(n)
+        out[order] = np.minimum(adjusted, 1.0)
+        return out
+    raise ValueError(f"p_adjust_method '{method}' is not supported by the NumPy engine (use fdr, BH, holm, bonferroni or none)")
+
+
+_erfc = np.vectorize(math.erfc)
+
+
+def stratified_split(y, split_prop, seed):
+    """Train/test rows for one seed: ceiling(n_class * split_prop) training rows per class (the
+    class sizes createDataPartition draws), redrawn until both classes have at least two samples
+    in train and test, as Binsplit does.
+
+    The rows come from NumPy's generator, so splits, and therefore selections, are not
+    seed-compatible with the R engine: seed s here and set.seed(s) there give different
+    partitions. Raises ValueError when 1000 draws in a row fail that check.
+    """
+    rng = np.random.default_rng(seed)
+    classes = [np.flatnonzero(y == c) for c in (0, 1)]
+    for _ in range(1000):
+        train = np.concatenate([rng.choice(idx, math.ceil(len(idx) * split_prop), replace=False) for idx in classes])
+        test = np.setdiff1d(np.arange(len(y)), train)
+        if min(np.sum(y[train] == 0), np.sum(y[train] == 1), np.sum(y[test] == 0), np.sum(y[test] == 1)) >= 2:
+            return np.sort(train), test
+    raise ValueError(f"Seed {seed}: could not draw a split with two samples of each class in train and test")
+
+
+def prefilter_columns(X, genes, settings, keep=()):
+    """Columns passing the config's prefilter: settings, as prefilter_features() in the R engines
+    (no cache: the NumPy pass is cheap). Constant and all-missing columns are always dropped."""
+    n_obs = (~np.isnan(X)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.nansum(X, axis=0) / n_obs
+        variance = np.nansum((X - means) ** 2, axis=0) / (n_obs - 1)
+    q = float(_setting(settings, "expression_quantile", 0.5))
+    k = np.maximum(1, np.ceil(q * n_obs)).astype(int)
+    # np.sort puts NaN last, so the k-th smallest observed value is at row k - 1
+    expr_quantile = np.sort(X, axis=0)[np.minimum(k, len(X)) - 1, np.arange(X.shape[1])]
+    expr_quantile[n_obs == 0] = np.nan
+
+    min_variance = float(_setting(settings, "min_variance", 0))
+    drop = np.isnan(variance) | (variance <= min_variance)
+    log(f"Pre-filter: variance <= {min_variance} - {drop.sum()} features")
+    if settings.get("max_missing_fraction") is not None:
+        drop_missing = 1 - n_obs / len(X) > float(settings["max_missing_fraction"])
+        log(f"Pre-filter: missing fraction > {settings['max_missing_fraction']} - {drop_missing.sum()} features")
+        drop |= drop_missing
+    if settings.get("min_expression") is not None:
+        with np.errstate(invalid="ignore"):
+            drop_expression = ~(expr_quantile >= float(settings["min_expression"]))
+        log(f"Pre-filter: {q} quantile < {settings['min_expression']} - {drop_expression.sum()} features")
+        drop |= drop_expression
+    kept = [g for g, d in zip(genes, drop) if not d or g in keep]
+    log(f"Pre-filter: kept {len(kept)} of {len(genes)} features")
+    return kept
+
+
+# ---------------------------------------------------------------------------
+# Per-seed work (runs in worker processes; the data is sent once per worker)
+# ---------------------------------------------------------------------------
+
+_X = None
+_Y = None
+_SPLITS = None
+
+
+def _init_worker(X, y, splits):
+    global _X, _Y, _SPLITS
+    _X, _Y, _SPLITS = X, y, splits
+
+
+def _screen_seed(s):
+    """Univariate logistic fit of every gene on the training rows of seed s.
+
+    Returns (estimate, std_error, p_value) arrays with NaN for genes R would skip (missing
+    values or a constant in the training set).
+    """
+    train, _ = _SPLITS[s]
+    Xtr = _X[train]
+    ytr = _Y[train].astype(float)
+    n_genes = Xtr.shape[1]
+    estimate = np.full(n_genes, np.nan)
+    std_error = np.full(n_genes, np.nan)
+    valid = ~np.isnan(Xtr).any(axis=0)
+    valid &= np.ptp(np.where(valid, Xtr, 0.0), axis=0) > 0
+    genes = np.flatnonzero(valid)
+    for start in range(0, len(genes), SCREEN_CHUNK):
+        chunk = genes[start : start + SCREEN_CHUNK]
+        estimate[chunk], std_error[chunk] = fit_univariate_logistic(Xtr[:, chunk], ytr)
+    p_value = _erfc(np.abs(estimate / std_error) / math.sqrt(2.0))
+    p_value[~valid] = np.nan
+    return estimate, std_error, p_value
+
+
+def _evaluate_seed(s, var_sets, predictions=False):
+    """Train/test AUC on seed s for models that share a size (each a list of column indices).
+
+    With predictions=True, also returns the first model's test scores and labels.
+    """
+    train, test = _SPLITS[s]
+    cols = np.array(var_sets)  # (models, variables)
+
+    def design(rows):
+        values = _X[rows][:, cols].transpose(1, 0, 2)  # (models, samples, variables)
+        mask = (~np.isnan(values).any(axis=2)).astype(float)
+        values = np.nan_to_num(values)
+        ones = np.ones(values.shape[:2] + (1,))
+        return np.concatenate([ones, values], axis=2), mask
+
+    Xtr, mtr = design(train)
+    Xts, mts = design(test)
+    beta = fit_logistic_batch(Xtr, _Y[train].astype(float), mtr)
+    # AUC is rank based, so the linear predictor ranks samples the same as the probabilities
+    lp_tr = (Xtr @ beta[..., None])[..., 0]
+    lp_ts = (Xts @ beta[..., None])[..., 0]
+    tr_auc = np.array([rank_auc(lp_tr[m][mtr[m] > 0], _Y[train][mtr[m] > 0]) for m in range(len(cols))])
+    ts_auc = np.array([rank_auc(lp_ts[m][mts[m] > 0], _Y[test][mts[m] > 0]) for m in range(len(cols))])
+    # R replaces an undefined AUC by 0
+    if predictions:
+        keep = mts[0] > 0
+        return np.nan_to_num(tr_auc), np.nan_to_num(ts_auc), lp_ts[0][keep], _Y[test][keep]
+    return np.nan_to_num(tr_auc), np.nan_to_num(ts_auc)
+
+
+# ---------------------------------------------------------------------------
+# Progress and run metrics
+# ---------------------------------------------------------------------------
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its finished workers in MB."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    usage = max(usage, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+class RunMetrics:
+    """Progress events and run_metrics.json in the same format as the R engine."""
+
+    def __init__(self):
+        self.start = time.time()
+        self.cpu_start = time.process_time()
+        self.model_fits = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.stages = []
+        self.depth = 0
+        self.stage = ""
+        self.stage_start = self.start
+
+    def start_stage(self, stage):
+        self.stage = stage
+        self.stage_start = time.time()
+
+    def progress(self, seed, total_seeds, candidates):
+        self.model_fits += candidates
+        now = time.time()
+        elapsed = now - self.start
+        event = {
+            "event": "progress",
+            "stage": self.stage,
+            "seed": seed,
+            "total_seeds": total_seeds,
+            "candidates": candidates,
+            "models": self.model_fits,
+            "elapsed": round(elapsed, 1),
+            "stage_elapsed": round(now - self.stage_start, 1),
+            "models_per_sec": round(self.model_fits / elapsed, 2) if elapsed > 0 else 0,
+        }
+        print(json.dumps(event, separators=(",", ":")), file=sys.stderr, flush=True)
+
+    def timed(self, stage, fn, *args, step=None):
+        fits_before = self.model_fits
+        wall_before = time.time()
+        cpu_before = time.process_time()
+        self.depth += 1
+        try:
+            return fn(*args)
+        finally:
+            self.stages.append(
+                {
+                    "stage": stage,
+                    "step": step,
+                    "depth": self.depth,
+                    "wall_sec": round(time.time() - wall_before, 3),
+                    # Worker processes are not included; compare wall_sec across engines
+                    "cpu_sec": round(time.process_time() - cpu_before, 3),
+                    "model_fits": self.model_fits - fits_before,
+                    "peak_rss_mb": round(peak_rss_mb(), 3),
+                }
+            )
+            self.depth -= 1
+
+    def write(self, path, info):
+        run = dict(
+            info,
+            wall_sec=round(time.time() - self.start, 3),
+            cpu_sec=round(time.process_time() - self.cpu_start, 3),
+            model_fits=self.model_fits,
+            evaluation_cache_hits=self.cache_hits,
+            evaluation_cache_misses=self.cache_misses,
+            peak_rss_mb=round(peak_rss_mb(), 3),
+        )
+        with open(path, "w") as f:
+            json.dump({"run": run, "stages": self.stages}, f, indent=2)
+        log(f"Run metrics written to {path}")
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+
+class BinaryEngine:
+    def __init__(self, X, y, genes, num_seed, split_prop, n_jobs, metrics):
+        self.genes = list(genes)
+        self.column = {g: i for i, g in enumerate(self.genes)}
+        self.num_seed = num_seed
+        self.metrics = metrics
+        # Mean train/test AUC per variable set; every set is scored on the same seeds, so
+        # backward steps and add/remove cycles reuse earlier forward evaluations
+        self.cache = {}
+        splits = [stratified_split(y, split_prop, s) for s in range(1, num_seed + 1)]
+        self.n_jobs = max(1, min(n_jobs, num_seed))
+        if self.n_jobs > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker, initargs=(X, y, splits))
+        else:
+            self.pool = None
+            _init_worker(X, y, splits)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def _map(self, fn, *args):
+        """fn(s, *args) for every seed in seed order, reporting progress after each one."""
+        seeds = range(self.num_seed)
+        if self.pool is None:
+            return (fn(s, *args) for s in seeds)
+        return self.pool.map(fn, seeds, *[[a] * self.num_seed for a in args])
+
+    def screen(self, n_screen, outcandir, freq, top_k, p_adjust_method, p_threshold):
+        """Univariate screen of the first n_screen columns (the features; included variables follow)."""
+        log(f"Processing {n_screen} variables across {self.num_seed} iterations")
+        log(f"P-value adjustment method: {p_adjust_method} , threshold: {p_threshold}")
+        self.metrics.start_stage("candidates")
+        counts = np.zeros(len(self.genes), dtype=int)
+        for s, (estimate, std_error, p_value) in enumerate(self._map(_screen_seed), start=1):
+            tested = np.flatnonzero(~np.isnan(p_value[:n_screen]))
+            self.metrics.progress(s, self.num_seed, len(tested))
+            table = pd.DataFrame(
+                {
+                    "X": [self.genes[i] for i in tested],
+                    "Estimate": estimate[tested],
+                    "Std..Error": std_error[tested],
+                    "Pr...z..": p_value[tested],
+                }
+            )
+            table["Adjusted_P"] = p_adjust(table["Pr...z.."].to_numpy(), p_adjust_method)
+            table = table[table["Adjusted_P"] < p_threshold]
+            if top_k is not None and len(table) > top_k:
+                table = table.sort_values("Adjusted_P", kind="mergesort").head(top_k)
+            table.to_csv(outcandir / f"Logistic_seed{s}.csv", index=False)
+            counts[[self.column[g] for g in table["X"]]] += 1
+            if s % 10 == 0 or s == 1:
+                log(f"Iteration {s} completed - {len(table)} significant variables (adjusted p < {p_threshold})")
+
+        seen = counts > 0
+        if not seen.any():
+            raise ValueError("No valid variables found in any iteration. Please check your data.")
+        summary = pd.DataFrame({"Gene": np.array(self.genes)[seen], "Freq": counts[seen]})
+        summary.to_csv(outcandir / "Logistic_UnivariateResults.csv", index=False)
+        candidates = summary.loc[summary["Freq"] > freq, "Gene"].tolist()
+        log(f"Candidate extraction complete - {len(candidates)} genes selected (Freq > {freq})")
+        return candidates
+
+    def evaluate(self, stage, var_sets):
+        """Mean train/test AUC over all seeds for each model (a list of variable names)."""
+        self.metrics.start_stage(stage)
+        keys = [frozenset(vs) for vs in var_sets]
+        todo = {key: vs for key, vs in zip(keys, var_sets) if key not in self.cache}
+        self.metrics.cache_hits += len(var_sets) - len(todo)
+        self.metrics.cache_misses += len(todo)
+        if todo:
+            cols = [[self.column[v] for v in vs] for vs in todo.values()]
+            tr_sum = np.zeros(len(cols))
+            ts_sum = np.zeros(len(cols))
+            for s, (tr_auc, ts_auc) in enumerate(self._map(_evaluate_seed, cols), start=1):
+                tr_sum += tr_auc
+                ts_sum += ts_auc
+                self.metrics.progress(s, self.num_seed, len(cols))
+            for key, tr, ts in zip(todo, tr_sum / self.num_seed, ts_sum / self.num_seed):
+                self.cache[key] = (tr, ts)
+        return np.array([self.cache[key][0] for key in keys]), np.array([self.cache[key][1] for key in keys])
+
+    def stepwise(self, totvar, fixvar, excvar, outdir, deadline=None):
+        """Forward/backward selection following BinTrainAUCStepwise."""
+        imtres = []
+        step = 0
+        status = "complete"
+        fixvar = list(fixvar)
+        log(f"Starting stepwise selection with {len(totvar)} candidate variables")
+
+        def record(kind, row):
+            imtres.append(row)
+            pd.DataFrame([row], columns=["Variable", "trainAUC", "testAUC"]).to_csv(
+                outdir / f"Intermediate_{kind}{len(imtres)}.csv", index=False
+            )
+
+        while len(set(fixvar) - set(excvar)) < len(totvar):
+            # Time budget is only checked between steps, so the last accepted model is always complete
+            if deadline is not None and imtres and time.time() >= deadline:
+                status = "budget_truncated"
+                log(f"Time budget exhausted after {step} steps - stopping with best model so far")
+                break
+            step += 1
+            candid = [g for g in totvar if g not in fixvar and g not in excvar]
+            if not candid:
+                break
+            log(f"Step {step} - Forward selection with {len(candid)} candidates, {len(fixvar)} currently selected")
+            tr, ts = self.metrics.timed("forward_step", self.evaluate, "forward", [fixvar + [g] for g in candid], step=step)
+            best = int(np.argmax(tr))
+            new_row = (" + ".join(fixvar + [candid[best]]), float(tr[best]), float(ts[best]))
+            if not imtres:
+                record("Forward", new_row)
+                fixvar = fixvar + [candid[best]]
+                log(f"Added first variable - TrainAUC: {tr[best]:.4f} , TestAUC: {ts[best]:.4f}")
+                continue
+            if new_row[1] <= imtres[-1][1] + 0.005:
+                log("No improvement - stopping stepwise selection")
+                break
+            forward_tr = new_row[1]
+            record("Forward", new_row)
+            fixvar = fixvar + [candid[best]]
+            log(f"Added variable - TrainAUC: {tr[best]:.4f} , TestAUC: {ts[best]:.4f} , Total vars: {len(fixvar)}")
+
+            if len(imtres) > 2:
+                backcandid = fixvar[: len(fixvar) - 2]
+                log(f"Backward step - Testing removal of {len(backcandid)} variables")
+                reduced = [[v for v in fixvar if v != g] for g in backcandid]
+                tr, ts = self.metrics.timed("backward_step", self.evaluate, "backward", reduced, step=step)
+                best = int(np.argmax(tr))
+                if tr[best] > forward_tr + 0.005:
+                    record("Backward", (" + ".join(reduced[best]), float(tr[best]), float(ts[best])))
+                    fixvar = reduced[best]
+                    log(f"Removed variable - TrainAUC: {tr[best]:.4f} , TestAUC: {ts[best]:.4f} , Total vars: {len(fixvar)}")
+
+        if not imtres:
+            return None
+        table = pd.DataFrame(imtres, columns=["Variable", "trainAUC", "testAUC"])
+        table["Status"] = status
+        table.to_csv(outdir / "Intermediate_Stepwise_Total.csv", index=False)
+        table.tail(1).to_csv(outdir / "Final_Stepwise_Total.csv", index=False)
+        final = table.iloc[-1]
+        n_vars = len(final["Variable"].split(" + "))
+        log(f"Stepwise selection {'budget-truncated' if status == 'budget_truncated' else 'complete'} - Final model has {n_vars} variables")
+        log(f"Final TrainAUC: {final['trainAUC']:.4f} , TestAUC: {final['testAUC']:.4f}")
+        return final
+
+    def auc_iterations(self, variables, path, n_boot=2000, conf_level=0.95):
+        """Per-seed train/test AUC of the final model (the table the apps show).
+
+        Percentile CIs of each test AUC are bootstrapped from the seed's test predictions.
+        """
+        self.metrics.start_stage("final")
+        cols = [[self.column[v] for v in variables]]
+        rows = []
+        for s, (tr_auc, ts_auc, scores, labels) in enumerate(self._map(_evaluate_seed, cols, True), start=1):
+            if n_boot > 0:
+                lower, upper = bootstrap_auc_ci(scores, labels, n_boot, conf_level, np.random.default_rng(s))
+            else:
+                lower = upper = np.nan
+            rows.append((s, tr_auc[0], ts_auc[0], lower, upper, ";".join(variables)))
+        table = pd.DataFrame(rows, columns=["iteration", "train_auc", "test_auc", "test_auc_lower", "test_auc_upper", "selected_genes"])
+        if n_boot <= 0:
+            table = table.drop(columns=["test_auc_lower", "test_auc_upper"])
+        table.to_csv(path, index=False)
+
+
+def _setting(section, name, default=None):
+    value = section.get(name)
+    return default if value is None else value
+
+
+def _find_column(columns, name):
+    # Main_Binary.R renames the outcome column case-insensitively
+    for c in columns:
+        if c.lower() == str(name).lower():
+            return c
+    raise ValueError(f"Column '{name}' not found in data")
+
+
+def run(config_path):
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+    run_start = time.time()
+    log("Starting Binary Classification Analysis (NumPy engine)")
+    if config.get("workdir"):
+        os.chdir(config["workdir"])
+    if not config.get("binary"):
+        raise ValueError("Binary configuration not found in config file")
+    bin_config = config["binary"]
+
+    data_file = bin_config.get("data_file") or config.get("data_file") or "Example_data.csv"
+    if not os.path.exists(data_file):
+        raise FileNotFoundError(f"Data file not found: {data_file}")
+    if bin_config.get("features_file"):
+        # Manifest written by generate_opentargets_configs.py: one column name per line
+        with open(bin_config["features_file"]) as f:
+            bin_config["features"] = [line.strip() for line in f if line.strip()]
+    log(f"Loading data from: {data_file}")
+    if bin_config.get("features"):
+        # Parse only the listed features and the id/outcome/time/include columns
+        wanted = set(bin_config["features"]) | set(bin_config.get("include") or [])
+        wanted |= {_setting(bin_config, "sample_id", "sample"), bin_config.get("time_variable")}
+        outcome_name = str(_setting(bin_config, "outcome", "OS")).lower()
+        dat = pd.read_csv(data_file, usecols=lambda c: c in wanted or c.lower() == outcome_name)
+    else:
+        dat = pd.read_csv(data_file)
+    log(f"Data loaded - {len(dat)} samples, {dat.shape[1]} columns")
+
+    sample_id = _setting(bin_config, "sample_id", "sample")
+    outcome = _find_column(dat.columns, _setting(bin_config, "outcome", "OS"))
+    time_var = bin_config.get("time_variable")
+    num_seed = int(_setting(bin_config, "num_seed", 100))
+    split_prop = float(_setting(bin_config, "split_prop", 0.7))
+    freq = int(_setting(bin_config, "freq", 80))
+    output_dir = Path(_setting(bin_config, "output_dir", "results/binary"))
+    top_k = bin_config.get("top_k")
+    top_k = None if top_k is None else int(top_k)
+    p_adjust_method = _setting(bin_config, "p_adjust_method", "fdr")
+    p_threshold = float(_setting(bin_config, "p_threshold", 0.05))
+    time_budget = bin_config.get("time_budget")
+    if time_budget is not None and float(time_budget) <= 0:
+        raise ValueError("time_budget must be a positive number of seconds")
+    n_jobs = int(_setting(bin_config, "n_jobs", os.cpu_count() or 1))
+    if _setting(bin_config, "selection_method", "stepwise") != "stepwise":
+        raise ValueError("selection_method elastic_net is not supported by the NumPy engine (use the R engine)")
+    for option in UNSUPPORTED_OPTIONS:
+        if bin_config.get(option) is not None:
+            log(f"{option} is not supported by the NumPy engine and is ignored")
+
+    excvar = [v for v in (bin_config.get("exclude") or []) if v]
+    fixvar = [v for v in (bin_config.get("include") or []) if v]
+    exclude_cols = {sample_id, outcome} | ({time_var} if time_var else set())
+    if bin_config.get("features"):
+        totvar = list(bin_config["features"])
+        log(f"Using {len(totvar)} specified features from config")
+    else:
+        totvar = [c for c in dat.columns if c not in exclude_cols]
+        log(f"Using {len(totvar)} features (auto-selected from {dat.shape[1]} total columns)")
+
+    evidence = config.get("evidence") or {}
+    if evidence.get("gene_file"):
+        if not os.path.exists(evidence["gene_file"]):
+            raise FileNotFoundError(f"Evidence gene file not found: {evidence['gene_file']}")
+        evidence_genes = pd.read_csv(evidence["gene_file"])
+        evidence_genes = evidence_genes[evidence_genes["score"] >= float(evidence.get("score_threshold") or 0.0)]
+        symbols = set(evidence_genes["gene_symbol"])
+        filtered = [g for g in totvar if g in symbols]
+        log(f"Evidence filtering: {len(symbols)} evidence genes, {len(totvar)} data genes, {len(filtered)} intersection")
+        if not filtered:
+            raise ValueError("No genes remaining after evidence filtering.")
+        totvar = filtered
+
+    if bin_config.get("prefilter"):
+        numeric = [g for g in totvar if pd.api.types.is_numeric_dtype(dat[g])]
+        kept = set(prefilter_columns(dat[numeric].to_numpy(dtype=float), numeric, bin_config["prefilter"], fixvar))
+        totvar = [g for g in totvar if g in kept or g not in numeric]
+        if not totvar:
+            raise ValueError("No features remaining after the pre-filter.")
+
+    outcandir = output_dir / "ExtBinCandidat"
+    outdir = output_dir / "StepBin"
+    outcandir.mkdir(parents=True, exist_ok=True)
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    y = dat[outcome].to_numpy()
+    if not np.isin(y, (0, 1)).all():
+        raise ValueError(f"Outcome column '{outcome}' must be coded 0/1")
+    y = y.astype(int)
+    # Features first, then included variables that are not features (screened columns come first)
+    model_vars = list(dict.fromkeys(totvar + fixvar))
+    try:
+        X = dat[model_vars].to_numpy(dtype=float)
+    except ValueError:
+        # Non-numeric entries become missing values, which the fits skip like R's complete cases
+        X = dat[model_vars].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+    metrics = RunMetrics()
+    info = {
+        "analysis": "binary",
+        "engine": "numpy",
+        "config": str(config_path),
+        "data_file": str(data_file),
+        "samples": len(dat),
+        "features": len(totvar),
+        "num_seed": num_seed,
+    }
+    engine = BinaryEngine(X, y, model_vars, num_seed, split_prop, n_jobs, metrics)
+    try:
+        print("STEPWISE_START", file=sys.stderr, flush=True)
+        log("Starting candidate gene extraction...")
+        log(f"Total iterations: {num_seed} , Variables: {len(totvar)}")
+        print(f"PROGRESS_START: {num_seed}", file=sys.stderr, flush=True)
+        candidates = metrics.timed(
+            "candidate_screen", engine.screen, len(totvar), outcandir, freq, top_k, p_adjust_method, p_threshold
+        )
+        print("STEPWISE_DONE", file=sys.stderr, flush=True)
+        log(f"Found {len(candidates)} candidate genes")
+        if not candidates:
+            log("No candidate genes found matching the criteria. Analysis cannot proceed.")
+            log("Try relaxing the p-value threshold or frequency cutoff in the configuration.")
+            metrics.write(output_dir / "run_metrics.json", dict(info, status="no_candidates"))
+            return 0
+
+        deadline = run_start + float(time_budget) if time_budget is not None else None
+        final = metrics.timed("stepwise", engine.stepwise, candidates, fixvar, excvar, outdir, deadline)
+        if final is None:
+            log("Stepwise selection failed to select any variables.")
+            metrics.write(output_dir / "run_metrics.json", dict(info, status="no_model"))
+            return 0
+        lookups = metrics.cache_hits + metrics.cache_misses
+        if lookups:
+            log(f"Evaluation cache: {metrics.cache_hits} of {lookups} evaluations reused ({100 * metrics.cache_hits / lookups:.1f}% hit rate)")
+        log("Stepwise selection completed")
+        metrics.timed(
+            "final_evaluation",
+            engine.auc_iterations,
+            final["Variable"].split(" + "),
+            output_dir / "auc_iterations.csv",
+            int(_setting(bin_config, "bootstrap_replicates", 2000)),
+            float(_setting(bin_config, "ci_level", 0.95)),
+        )
+        metrics.write(output_dir / "run_metrics.json", dict(info, status=final["Status"]))
+    finally:
+        engine.close()
+    log("Analysis complete!")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy engine for binary PROMISE analyses")
+    parser.add_argument("--config", default="config/example_analysis.yaml")
+    args = parser.parse_args()
+    try:
+        return run(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
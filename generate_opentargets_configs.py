@@ -5,15 +5,23 @@ Generate Open Targets evidence-filtered analysis configuration files.
 Reads existing TCGA config files and creates new configs with an 'evidence'
 section and redirected output directories.
 
+The evidence genes (score >= threshold) are also intersected with each data
+file's header here, once, and the resulting feature list is written to a
+sidecar manifest (features_file:, default) or inline into features:. The R
+scripts then parse only those columns of the data file instead of all of them.
+
 Usage:
     python3 generate_opentargets_configs.py [--datasets TCGA_BRCA TCGA_CHOL]
     python3 generate_opentargets_configs.py --score-threshold 0.2
+    python3 generate_opentargets_configs.py --features inline
 """
 
 import argparse
+import csv
 import glob
 import json
 import os
+import re
 import sys
 
 import yaml
@@ -21,6 +29,7 @@ import yaml
 MAPPING_FILE = "tcga_efo_mapping.json"
 EVIDENCE_DIR = "evidence"
 CONFIG_DIR = "config"
+MANIFEST_DIR = os.path.join(CONFIG_DIR, "manifests")
 
 
 def load_mapping(mapping_file):
@@ -28,7 +37,64 @@ def load_mapping(mapping_file):
         return json.load(f)
 
 
-def generate_config(dataset, base_config_path, mapping_info, score_threshold, evidence_dir):
+R_RESERVED = {
+    "if", "else", "repeat", "while", "function", "for", "next", "break", "TRUE", "FALSE", "NULL",
+    "Inf", "NaN", "NA", "NA_integer_", "NA_real_", "NA_character_", "NA_complex_", "in",
+}
+
+
+def make_names(names):
+    """R's make.names(names, unique = TRUE), which read.csv applies to the header."""
+    out = []
+    for name in names:
+        name = re.sub(r"[^A-Za-z0-9._]", ".", name)
+        if not re.match(r"[A-Za-z]|\.(?![0-9])", name):
+            name = "X" + name
+        if name in R_RESERVED:
+            name += "."
+        out.append(name)
+    # make.unique: later duplicates get .1, .2, ... skipping names already taken
+    seen = set(out)
+    counts = {}
+    first = set()
+    for i, name in enumerate(out):
+        if name not in first:
+            first.add(name)
+            continue
+        n = counts.get(name, 0)
+        while f"{name}.{n + 1}" in seen:
+            n += 1
+        counts[name] = n + 1
+        out[i] = f"{name}.{n + 1}"
+        seen.add(out[i])
+    return out
+
+
+def read_header(data_file, cache):
+    """Column names of a data file as R sees them; each file is read once per run."""
+    if data_file not in cache:
+        with open(data_file, newline="") as f:
+            cache[data_file] = make_names(next(csv.reader(f), []))
+    return cache[data_file]
+
+
+def evidence_features(mode, section, data_file, symbols, header_cache):
+    """Features of a binary/survival section that are evidence genes, in data column order, as
+    Main_Binary.R / Main_Survival.R compute them (features: or every column except the sample,
+    outcome/event and time columns, intersected with the evidence genes)."""
+    if section.get("features"):
+        candidates = list(section["features"])
+    else:
+        outcome_key = "outcome" if mode == "binary" else "event"
+        special = {section.get("sample_id", "sample"), section.get(outcome_key, "OS"),
+                   section.get("time_variable", "OS.year" if mode == "survival" else None)}
+        special = {str(name).lower() for name in special if name is not None}
+        candidates = [c for c in read_header(data_file, header_cache) if c.lower() not in special]
+    return [g for g in candidates if g in symbols]
+
+
+def generate_config(dataset, base_config_path, mapping_info, score_threshold, evidence_dir,
+                    features_mode="manifest", manifest_dir=MANIFEST_DIR, header_cache=None):
     """Generate an opentargets-filtered config from a base config."""
     with open(base_config_path, "r") as f:
         config = yaml.safe_load(f)
@@ -57,6 +123,34 @@ def generate_config(dataset, base_config_path, mapping_info, score_threshold, ev
     if "survival" in config:
         config["survival"]["output_dir"] = f"results/{dataset}_opentargets/survival"
 
+    if features_mode == "none":
+        return config
+
+    with open(evidence_file, newline="") as f:
+        symbols = {row["gene_symbol"] for row in csv.DictReader(f) if float(row["score"]) >= score_threshold}
+    workdir = config.get("workdir") or "."
+    header_cache = {} if header_cache is None else header_cache
+    for mode in ("binary", "survival"):
+        if mode not in config:
+            continue
+        section = config[mode]
+        data_file = section.get("data_file") or config.get("data_file") or ""
+        if not os.path.isfile(os.path.join(workdir, data_file)):
+            print(f"  Warning: Data file not found: {data_file} - {mode} features left to R", file=sys.stderr)
+            continue
+        features = evidence_features(mode, section, os.path.join(workdir, data_file), symbols, header_cache)
+        print(f"  {mode}: {len(symbols)} evidence genes, {len(features)} in {data_file}")
+        if features_mode == "inline":
+            section["features"] = features
+            continue
+        os.makedirs(manifest_dir, exist_ok=True)
+        manifest = os.path.join(manifest_dir, f"{dataset}_opentargets_{mode}_features.txt")
+        with open(manifest, "w") as f:
+            f.write("".join(g + "\n" for g in features))
+        section.pop("features", None)
+        # Paths in the config are relative to workdir, where the R scripts run
+        section["features_file"] = os.path.relpath(manifest, workdir)
+
     return config
 
 
@@ -91,6 +185,18 @@ def main():
         default=CONFIG_DIR,
         help=f"Directory for config files (default: {CONFIG_DIR})",
     )
+    parser.add_argument(
+        "--features",
+        choices=("manifest", "inline", "none"),
+        default="manifest",
+        help="Where to write the evidence-filtered feature list: a sidecar manifest "
+        "(features_file:, default), the config's features: key, or nowhere",
+    )
+    parser.add_argument(
+        "--manifest-dir",
+        default=MANIFEST_DIR,
+        help=f"Directory for feature manifests (default: {MANIFEST_DIR})",
+    )
     args = parser.parse_args()
 
     # Load mapping
@@ -119,6 +225,7 @@ def main():
 
     print(f"Generating opentargets configs for {total} datasets")
     print("=" * 60)
+    header_cache = {}
 
     for dataset, info in sorted(datasets.items()):
         base_config = os.path.join(args.config_dir, f"{dataset}_analysis.yaml")
@@ -130,7 +237,8 @@ def main():
             continue
 
         config = generate_config(
-            dataset, base_config, info, args.score_threshold, args.evidence_dir
+            dataset, base_config, info, args.score_threshold, args.evidence_dir,
+            args.features, args.manifest_dir, header_cache,
         )
         if config is None:
             skipped += 1
@@ -606,13 +606,76 @@ async fn run_via_docker(
     Ok(())
 }
 
+/// Human-readable duration for the stage ETA in progress messages.
+fn format_eta(seconds: f64) -> String {
+    let secs = seconds.round() as u64;
+    if secs < 60 {
+        format!("{} s", secs)
+    } else if secs < 3600 {
+        format!("{} min {} s", secs / 60, secs % 60)
+    } else {
+        format!("{} h {} min", secs / 3600, secs % 3600 / 60)
+    }
+}
+
+/// Structured progress event written by the R engines (one JSON object per line).
+/// Mirrors ProgressTracker in progress_events.py: the stage ETA is extrapolated from
+/// `stage_elapsed` over the seeds completed so far.
+fn parse_progress_event(line: &str) -> Option<serde_json::Value> {
+    let event: serde_json::Value = serde_json::from_str(line).ok()?;
+    if event["event"] != "progress" {
+        return None;
+    }
+    let stage = event["stage"].as_str().unwrap_or("");
+    let current = event["seed"].as_u64().unwrap_or(0);
+    let total = event["total_seeds"].as_u64().unwrap_or(0);
+    let candidates = event["candidates"].as_u64().unwrap_or(0);
+    let models_per_sec = event["models_per_sec"].as_f64().unwrap_or(0.0);
+    let stage_elapsed = event["stage_elapsed"].as_f64().unwrap_or(0.0);
+    let eta = if current > 0 && total >= current {
+        Some(stage_elapsed / current as f64 * (total - current) as f64)
+    } else {
+        None
+    };
+    let label = match stage {
+        "candidates" => "Candidate screening",
+        "forward" => "Forward step",
+        "backward" => "Backward step",
+        other => other,
+    };
+    Some(serde_json::json!({
+        "type": "iteration",
+        "current": current,
+        "total": total,
+        "stage": stage,
+        "modelsPerSec": models_per_sec,
+        "etaSeconds": eta,
+        "message": format!(
+            "{}: seed {}/{}, {} candidates, {:.1} models/s, stage ETA {}",
+            label,
+            current,
+            total,
+            candidates,
+            models_per_sec,
+            eta.map(format_eta).unwrap_or_else(|| "-".to_string())
+        ),
+    }))
+}
+
 /// Parse R progress output lines.
 /// Supports:
 ///   - `STEPWISE_LOG:Iteration 99 of 100 ( 99 %)`
 ///   - `STEPWISE_LOG:Iteration 99 completed - N significant variables ...`
 ///   - `STEPWISE_LOG:Total iterations: 100 , Variables: 293`
 ///   - `[1/100] Iteration 1`
+///   - `{"event":"progress","stage":"forward","seed":40,"total_seeds":100,...}` (see parse_progress_event)
 fn parse_progress_line(line: &str) -> Option<serde_json::Value> {
+    // Pattern 0: structured JSON progress event
+    let trimmed = line.trim();
+    if trimmed.starts_with('{') {
+        return parse_progress_event(trimmed);
+    }
+
     // Pattern 1a: STEPWISE_LOG:Iteration X of Y (explicit progress)
     if let Some(rest) = line.strip_prefix("STEPWISE_LOG:Iteration ") {
         let parts: Vec<&str> = rest.splitn(3, ' ').collect();
@@ -767,6 +830,31 @@ mod tests {
         assert_eq!(val["type"], "total");
     }
 
+    #[test]
+    fn test_parse_progress_json_event() {
+        let line = r#"{"event":"progress","stage":"forward","seed":40,"total_seeds":100,"candidates":35,"models":5200,"elapsed":81.2,"stage_elapsed":20.0,"models_per_sec":64.03}"#;
+        let val = parse_progress_line(line).unwrap();
+        assert_eq!(val["type"], "iteration");
+        assert_eq!(val["current"], 40);
+        assert_eq!(val["total"], 100);
+        assert_eq!(val["stage"], "forward");
+        assert_eq!(val["etaSeconds"], 30.0);
+        assert_eq!(val["message"], "Forward step: seed 40/100, 35 candidates, 64.0 models/s, stage ETA 30 s");
+    }
+
+    #[test]
+    fn test_parse_progress_json_first_event_has_no_eta() {
+        let line = r#"{"event":"progress","stage":"candidates","seed":0,"total_seeds":100,"candidates":20,"models":0,"elapsed":0.0,"stage_elapsed":0.0,"models_per_sec":0.00}"#;
+        let val = parse_progress_line(line).unwrap();
+        assert!(val["etaSeconds"].is_null());
+    }
+
+    #[test]
+    fn test_parse_progress_json_other_object_ignored() {
+        assert!(parse_progress_line(r#"{"event":"other"}"#).is_none());
+        assert!(parse_progress_line("{not json").is_none());
+    }
+
     #[test]
     fn test_parse_stepwise_log_subprogress_ignored() {
         let result = parse_progress_line("STEPWISE_LOG:Iteration 99 - Processing variable 250 of 293");
@@ -45,4 +45,8 @@ export interface ProgressEvent {
   current: number;
   total: number;
   message: string;
+  /** Set for structured R progress events */
+  stage?: string;
+  modelsPerSec?: number;
+  etaSeconds?: number | null;
 }
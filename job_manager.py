@@ -0,0 +1,224 @@
+"""
+Background job manager for the Streamlit app.
+
+Analyses run on a shared thread pool instead of inside the Streamlit script run, so a
+browser refresh does not lose them and several jobs can be queued. The pool size caps
+how many R analyses run at once across all users of the app process
+(PROMISE_MAX_JOBS, default 2). Each job has a persistent ID and a directory under
+results/.jobs/<job_id>/ holding job.json (status and progress) and log.txt, so the UI
+can re-attach after a reload and the job list survives an app restart.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from progress_events import ProgressTracker
+from worker_client import start_analysis
+
+JOBS_DIR = Path(os.environ.get("PROMISE_JOBS_DIR", "results/.jobs"))
+MAX_CONCURRENT_JOBS = int(os.environ.get("PROMISE_MAX_JOBS", "2"))
+# Seconds; unset or 0 means no limit (long cohorts are no longer killed at 10 minutes). A watchdog
+# enforces it even when the job writes nothing (a long stage with buffered logging)
+JOB_TIMEOUT = float(os.environ.get("PROMISE_JOB_TIMEOUT", "0"))
+SAVE_INTERVAL = 1.0
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobManager:
+    def __init__(self, jobs_dir=JOBS_DIR, max_workers=MAX_CONCURRENT_JOBS, on_finish=None):
+        self.jobs_dir = Path(jobs_dir)
+        # Called with the final job dict when a job completes or fails
+        self._on_finish = on_finish
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._processes = {}
+        self._load_jobs()
+
+    def _load_jobs(self):
+        for job_file in self.jobs_dir.glob("*/job.json"):
+            try:
+                job = json.loads(job_file.read_text())
+            except (OSError, ValueError):
+                continue
+            # Jobs that were queued or running when the previous app process exited are gone
+            if job.get("status") in ACTIVE_STATUSES:
+                job["status"] = "interrupted"
+                job["message"] = "App restarted while the job was running"
+                self._write(job)
+            self._jobs[job["id"]] = job
+
+    def _write(self, job):
+        job_dir = self.jobs_dir / job["id"]
+        job_dir.mkdir(parents=True, exist_ok=True)
+        tmp = job_dir / "job.json.tmp"
+        tmp.write_text(json.dumps(job, indent=2))
+        tmp.replace(job_dir / "job.json")
+
+    def submit(self, mode, config_path, output_dir, total_iterations, label="", cache_key=None, engine="r"):
+        """Queue an analysis and return its job ID. engine is "r" or "numpy" (binary only)."""
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "label": label,
+            "mode": mode,
+            "engine": engine,
+            "config_path": str(config_path),
+            "output_dir": str(output_dir),
+            "status": "queued",
+            "stage": "queued",
+            "message": "Waiting for a free analysis slot...",
+            "current_iteration": 0,
+            "total_iterations": total_iterations,
+            "progress_message": "",
+            "models_per_sec": 0.0,
+            "eta_seconds": None,
+            "run_eta_seconds": None,
+            "returncode": None,
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+            "cache_key": cache_key,
+        }
+        with self._lock:
+            self._jobs[job["id"]] = job
+            self._write(job)
+        self._executor.submit(self._run, job["id"])
+        return job["id"]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self):
+        with self._lock:
+            jobs = [dict(j) for j in self._jobs.values()]
+        return sorted(jobs, key=lambda j: j["created"], reverse=True)
+
+    def find_active(self, cache_key):
+        """ID of a queued/running job for the same cache key, so resubmissions attach to it."""
+        for job in self.list_jobs():
+            if job.get("cache_key") == cache_key and job["status"] in ACTIVE_STATUSES:
+                return job["id"]
+        return None
+
+    def queue_position(self, job_id):
+        queued = [j for j in self.list_jobs() if j["status"] == "queued"]
+        queued.sort(key=lambda j: j["created"])
+        ids = [j["id"] for j in queued]
+        return ids.index(job_id) + 1 if job_id in ids else 0
+
+    def log_tail(self, job_id, n_lines=40):
+        log_file = self.jobs_dir / job_id / "log.txt"
+        if not log_file.exists():
+            return ""
+        lines = log_file.read_text(errors="replace").splitlines()
+        return "\n".join(
+            l for l in lines[-n_lines:] if not l.startswith("PROGRESS") and not l.startswith('{"event"')
+        )
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] not in ACTIVE_STATUSES:
+                return False
+            job["status"] = "cancelled"
+            job["message"] = "Cancelled by user"
+            job["finished"] = time.time()
+            self._write(job)
+            process = self._processes.get(job_id)
+        if process is not None:
+            _kill(process)
+        return True
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+            return dict(self._jobs[job_id])
+
+    def _run(self, job_id):
+        job = self.get(job_id)
+        if job is None or job["status"] != "queued":
+            return  # cancelled while waiting in the queue
+        self._update(job_id, status="running", stage="starting", message="Starting R script...", started=time.time())
+        log_path = self.jobs_dir / job_id / "log.txt"
+        try:
+            process = start_analysis(job["mode"], job["config_path"], job.get("engine", "r"))
+        except (OSError, ValueError) as e:
+            self._write(self._update(job_id, status="failed", message=f"Could not start analysis: {e}", finished=time.time()))
+            return
+        with self._lock:
+            self._processes[job_id] = process
+        # pixi/Rscript subprocesses also write to stdout; drain it so the pipe never fills up
+        if getattr(process, "stdout", None) is not None:
+            threading.Thread(target=_drain, args=(process.stdout,), daemon=True).start()
+
+        tracker = ProgressTracker()
+        last_save = 0.0
+        timed_out = threading.Event()
+        watchdog = None
+        if JOB_TIMEOUT:
+            watchdog = threading.Timer(JOB_TIMEOUT, _expire, args=(process, timed_out))
+            watchdog.daemon = True
+            watchdog.start()
+        with open(log_path, "a", encoding="utf-8") as log:
+            for line in iter(process.stderr.readline, ""):
+                log.write(line)
+                if self.get(job_id)["status"] == "cancelled":
+                    break
+                self._update(job_id, **tracker.feed(line))
+                if time.time() - last_save > SAVE_INTERVAL:
+                    log.flush()
+                    self._write(self.get(job_id))
+                    last_save = time.time()
+        if watchdog is not None:
+            watchdog.cancel()
+        process.stderr.close()
+        returncode = process.wait()
+
+        with self._lock:
+            self._processes.pop(job_id, None)
+            cancelled = self._jobs[job_id]["status"] == "cancelled"
+        if cancelled:
+            return
+        if timed_out.is_set() and returncode != 0:
+            final = self._update(job_id, status="failed", message=f"Timed out after {JOB_TIMEOUT:.0f} s", returncode=returncode, finished=time.time())
+        elif returncode == 0:
+            final = self._update(job_id, status="completed", stage="done", message="Analysis completed", returncode=0, finished=time.time())
+        else:
+            final = self._update(job_id, status="failed", message="Error occurred during analysis", returncode=returncode, finished=time.time())
+        self._write(final)
+        if self._on_finish is not None:
+            self._on_finish(final)
+
+
+def _kill(process):
+    """Kill a job; for pixi/Python subprocesses the whole process group, so Rscript goes too."""
+    if isinstance(process, subprocess.Popen) and hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except OSError:
+            pass
+    process.kill()
+
+
+def _expire(process, timed_out):
+    # The killed process closes stderr, which ends the reading loop in _run
+    timed_out.set()
+    _kill(process)
+
+
+def _drain(stream):
+    for _ in iter(stream.readline, ""):
+        pass
+    stream.close()
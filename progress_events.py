@@ -0,0 +1,128 @@
+"""
+Shared parser for the R analysis progress stream.
+
+The R engines write one JSON object per line for progress, e.g.
+
+    {"event":"progress","stage":"forward","seed":40,"total_seeds":100,"candidates":35,
+     "models":5200,"elapsed":81.2,"stage_elapsed":20.1,"models_per_sec":64.03}
+
+next to the human-readable STEPWISE_LOG:/PROGRESS_START:/STEPWISE_START/STEPWISE_DONE
+lines. ProgressTracker turns either kind of line into field updates (stage, seed counts,
+throughput, a live ETA for the current stage and an estimate for the rest of the run) for the
+job manager and the Streamlit UI. The Tauri backend implements the same per-stage rules in
+parse_progress_line (analysis.rs).
+"""
+
+import json
+import re
+
+STAGE_LABELS = {
+    "candidates": "Candidate screening",
+    "forward": "Forward step",
+    "backward": "Backward step",
+}
+
+
+def parse_event(line):
+    """The JSON progress event on this line, or None for any other line."""
+    text = line.strip()
+    if not text.startswith("{"):
+        return None
+    try:
+        event = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(event, dict) or event.get("event") != "progress":
+        return None
+    return event
+
+
+def stage_eta(event):
+    """Seconds left in the event's stage, extrapolated from the seeds done so far."""
+    seed = event.get("seed", 0)
+    total = event.get("total_seeds", 0)
+    if seed <= 0 or total <= 0:
+        return None
+    return event.get("stage_elapsed", 0.0) / seed * (total - seed)
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    if seconds < 3600:
+        return f"{seconds // 60} min {seconds % 60} s"
+    return f"{seconds // 3600} h {seconds % 3600 // 60} min"
+
+
+def describe_event(event):
+    label = STAGE_LABELS.get(event.get("stage"), event.get("stage", ""))
+    return (
+        f"{label}: seed {event.get('seed', 0)}/{event.get('total_seeds', 0)}, "
+        f"{event.get('candidates', 0)} candidates, "
+        f"{event.get('models_per_sec', 0.0):.1f} models/s, "
+        f"stage ETA {format_duration(stage_eta(event))}"
+    )
+
+
+class ProgressTracker:
+    """Feed stderr lines in order; each call returns the job fields that changed."""
+
+    def __init__(self):
+        self.last_event = None
+        # Candidates and seconds per model of the latest forward step
+        self.forward_candidates = 0
+        self.forward_seconds_per_model = None
+
+    def run_eta(self, event):
+        """Seconds left in the whole run at the current pace (None before the first event).
+
+        The rest of the current stage plus, once a forward step has been seen, one more forward
+        step over one candidate fewer: every stepwise run ends with a forward step that adds
+        nothing, so at least that much remains unless the current forward step is that last one.
+        Stages whose size is not known yet (the first forward step during the candidate screen)
+        and the final evaluation and plots are not included, so this is a lower estimate.
+        """
+        remaining = stage_eta(event)
+        if remaining is None:
+            return None
+        stage = event.get("stage")
+        seed = event.get("seed", 0)
+        candidates = event.get("candidates", 0)
+        if stage == "forward" and candidates > 0:
+            self.forward_candidates = candidates
+            self.forward_seconds_per_model = event.get("stage_elapsed", 0.0) / (seed * candidates)
+        if stage in ("forward", "backward") and self.forward_seconds_per_model is not None:
+            next_step = max(self.forward_candidates - 1, 0) * event.get("total_seeds", 0)
+            remaining += next_step * self.forward_seconds_per_model
+        return remaining
+
+    def feed(self, line):
+        event = parse_event(line)
+        if event is not None:
+            self.last_event = event
+            return {
+                "stage": event.get("stage", ""),
+                "current_iteration": event.get("seed", 0),
+                "total_iterations": event.get("total_seeds", 0),
+                "models_fitted": event.get("models", 0),
+                "models_per_sec": event.get("models_per_sec", 0.0),
+                "elapsed": event.get("elapsed", 0.0),
+                "eta_seconds": stage_eta(event),
+                "run_eta_seconds": self.run_eta(event),
+                "progress_message": describe_event(event),
+            }
+
+        if "PROGRESS_START:" in line:
+            match = re.search(r"PROGRESS_START:\s*(\d+)", line)
+            if match:
+                return {"total_iterations": int(match.group(1))}
+        elif "STEPWISE_START" in line:
+            return {"message": "Step 1/2: Candidate screening..."}
+        elif "STEPWISE_DONE" in line:
+            return {"message": "Step 1/2 complete! Starting stepwise selection..."}
+        elif "STEPWISE_LOG:" in line:
+            return {"message": line.split("STEPWISE_LOG:", 1)[1].strip()}
+        return {}
@@ -0,0 +1,127 @@
+"""
+Content-addressed result cache for the Streamlit app.
+
+A submission is keyed by a hash of the uploaded data bytes plus the resolved analysis
+settings. Each key owns a directory under results/.result_cache/<key>/ holding the data
+file (copied once, streamed from the uploaded bytes), the generated config and the R
+output. A COMPLETE marker is written when the analysis succeeds, so resubmitting the same
+data with the same settings serves the stored outputs immediately.
+
+Entries are evicted least-recently-used first once the cache exceeds
+PROMISE_RESULT_CACHE_MAX_MB (default 2000), and entries not used for
+PROMISE_RESULT_CACHE_MAX_AGE_DAYS (default 30) are always removed.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(os.environ.get("PROMISE_RESULT_CACHE_DIR", "results/.result_cache"))
+MAX_MB = float(os.environ.get("PROMISE_RESULT_CACHE_MAX_MB", "2000"))
+MAX_AGE_DAYS = float(os.environ.get("PROMISE_RESULT_CACHE_MAX_AGE_DAYS", "30"))
+
+COMPLETE_MARKER = "COMPLETE"
+
+
+CHUNK_SIZE = 1 << 20
+
+
+def iter_chunks(source):
+    """Yield the bytes of a path or a seekable binary file object in 1 MB chunks."""
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            yield from iter(lambda: f.read(CHUNK_SIZE), b"")
+    else:
+        source.seek(0)
+        yield from iter(lambda: source.read(CHUNK_SIZE), b"")
+        source.seek(0)
+
+
+def cache_key(source, settings):
+    """sha256 of the data (path or file object) plus the analysis settings (paths excluded by the caller)."""
+    digest = hashlib.sha256()
+    for chunk in iter_chunks(source):
+        digest.update(chunk)
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def _dir_size(path):
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+class ResultCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_mb=MAX_MB, max_age_days=MAX_AGE_DAYS):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.max_age = max_age_days * 86400
+
+    def entry_dir(self, key):
+        return self.cache_dir / key
+
+    def output_dir(self, key):
+        return self.entry_dir(key) / "output"
+
+    def store_data(self, key, file_name, source):
+        """Copy the original data bytes once per key and return the path R should read."""
+        entry = self.entry_dir(key)
+        entry.mkdir(parents=True, exist_ok=True)
+        data_path = entry / Path(file_name).name
+        if not data_path.exists():
+            tmp = data_path.with_suffix(data_path.suffix + ".tmp")
+            with open(tmp, "wb") as out:
+                for chunk in iter_chunks(source):
+                    out.write(chunk)
+            tmp.replace(data_path)
+        return data_path
+
+    def lookup(self, key):
+        """Output directory of a completed entry (marking it as recently used), else None."""
+        marker = self.entry_dir(key) / COMPLETE_MARKER
+        if not marker.exists() or not self.output_dir(key).exists():
+            return None
+        marker.touch()
+        return self.output_dir(key)
+
+    def record_job(self, job):
+        """JobManager completion hook: mark the job's entry complete and enforce the limits."""
+        key = job.get("cache_key")
+        if not key:
+            return
+        if job["status"] == "completed":
+            (self.entry_dir(key) / COMPLETE_MARKER).touch()
+        self.evict()
+
+    def evict(self, active_keys=()):
+        now = time.time()
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            if not entry.is_dir() or entry.name in active_keys:
+                continue
+            marker = entry / COMPLETE_MARKER
+            if marker.exists():
+                last_used = marker.stat().st_mtime
+            else:
+                # A run still in progress keeps writing intermediate files
+                last_used = max([f.stat().st_mtime for f in entry.rglob("*")] + [entry.stat().st_mtime])
+            entries.append((last_used, entry, marker.exists()))
+
+        kept = []
+        for last_used, entry, complete in entries:
+            # Incomplete entries untouched for a day are failed or abandoned runs
+            too_old = now - last_used > (self.max_age if complete else min(self.max_age, 86400))
+            if too_old:
+                shutil.rmtree(entry, ignore_errors=True)
+            elif complete:
+                kept.append((last_used, entry))
+
+        kept.sort()
+        total = sum(_dir_size(entry) for _, entry in kept)
+        while kept and total > self.max_bytes:
+            _, entry = kept.pop(0)
+            total -= _dir_size(entry)
+            shutil.rmtree(entry, ignore_errors=True)
@@ -47,6 +47,15 @@ if [ ! -d ".pixi" ]; then
     exit 1
 fi
 
+# Run one analysis; uses the warm R worker (pixi run worker) when PROMISE_WORKER_PORT is set
+run_analysis() {
+    if [ -n "$PROMISE_WORKER_PORT" ]; then
+        python3 worker_client.py "$1" "$2"
+    else
+        pixi run "$1" -- --config "$2"
+    fi
+}
+
 # Get all TCGA config files
 CONFIG_FILES=(config/TCGA_*_analysis.yaml)
 
@@ -84,7 +93,7 @@ for i in "${!CONFIG_FILES[@]}"; do
     # Run binary analysis
     print_info "Running binary analysis: pixi run binary -- --config $CONFIG"
     print_info "Output: results/$DATASET/binary"
-    if pixi run binary -- --config "$CONFIG" 2>&1; then
+    if run_analysis binary "$CONFIG" 2>&1; then
         print_success "$DATASET binary analysis completed"
         BINARY_SUCCESS_COUNT=$((BINARY_SUCCESS_COUNT + 1))
     else
@@ -99,7 +108,7 @@ for i in "${!CONFIG_FILES[@]}"; do
     # Run survival analysis
     print_info "Running survival analysis: pixi run survival -- --config $CONFIG"
     print_info "Output: results/$DATASET/survival"
-    if pixi run survival -- --config "$CONFIG" 2>&1; then
+    if run_analysis survival "$CONFIG" 2>&1; then
         print_success "$DATASET survival analysis completed"
         SURVIVAL_SUCCESS_COUNT=$((SURVIVAL_SUCCESS_COUNT + 1))
     else
@@ -123,6 +132,17 @@ echo -e "  ${GREEN}✓ Successful: $SURVIVAL_SUCCESS_COUNT${NC}"
 echo -e "  ${RED}✗ Failed: $SURVIVAL_FAIL_COUNT${NC}"
 echo ""
 
+# Aggregate per-stage timings from every run_metrics.json into one table
+METRICS_FILES=()
+for f in results/*/binary/run_metrics.json results/*/survival/run_metrics.json; do
+    [ -f "$f" ] && METRICS_FILES+=("$f")
+done
+if [ ${#METRICS_FILES[@]} -gt 0 ]; then
+    print_info "Aggregating run metrics: results/run_metrics_summary.csv"
+    pixi run Rscript Summarize_Run_Metrics.R --output results/run_metrics_summary.csv "${METRICS_FILES[@]}"
+    echo ""
+fi
+
 EXIT_CODE=0
 if [ $BINARY_FAIL_COUNT -gt 0 ]; then
     print_error "Failed binary analyses:"
@@ -3,14 +3,68 @@ Prognosis Marker - Simple Analysis Interface
 데이터 업로드하고 분석 실행하는 간단한 웹 인터페이스
 """
 
+import csv
+import io
 import streamlit as st
 import pandas as pd
-import subprocess
-import tempfile
 import yaml
 from pathlib import Path
 import time
 
+from job_manager import JOB_TIMEOUT, JobManager
+from progress_events import format_duration
+from result_cache import ResultCache, cache_key
+
+PREVIEW_ROWS = 10
+
+
+def count_csv_rows(source):
+    """Data rows of a CSV path or binary file object, header and blank lines excluded.
+
+    Rows are counted as csv records, so a quoted field spanning several lines counts once.
+    """
+    if isinstance(source, Path):
+        with open(source, newline="", encoding="utf-8", errors="replace") as f:
+            return max(sum(1 for row in csv.reader(f) if row) - 1, 0)
+    source.seek(0)
+    text = io.TextIOWrapper(source, encoding="utf-8", errors="replace", newline="")
+    try:
+        return max(sum(1 for row in csv.reader(text) if row) - 1, 0)
+    finally:
+        # Leave the upload open for the later reads
+        text.detach()
+        source.seek(0)
+
+
+def file_identity(source):
+    """Name, size and mtime of a path, or name, size and upload id of an uploaded file."""
+    if isinstance(source, Path):
+        stat = source.stat()
+        return str(source.resolve()), stat.st_size, stat.st_mtime_ns
+    return source.name, source.size, getattr(source, "file_id", None)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _read_preview(identity, _source, n_rows):
+    if isinstance(_source, Path):
+        preview = pd.read_csv(_source, nrows=n_rows, engine="c")
+    else:
+        _source.seek(0)
+        preview = pd.read_csv(_source, nrows=n_rows, engine="c")
+        _source.seek(0)
+    return preview, count_csv_rows(_source)
+
+
+def read_preview(source, n_rows=PREVIEW_ROWS):
+    """Header and first rows for the UI plus the total row count.
+
+    Only the preview rows are parsed; R reads the original file, so a large expression
+    matrix is never materialised as a pandas DataFrame here. The result is cached per file
+    identity, so reruns of the page do not rescan the file.
+    """
+    return _read_preview(file_identity(source), source, n_rows)
+
+
 # Page configuration
 st.set_page_config(page_title="Prognosis Marker", page_icon="🔬", layout="wide")
 
@@ -373,11 +427,30 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+@st.cache_resource
+def get_result_cache():
+    cache = ResultCache()
+    cache.evict()
+    return cache
+
+
+@st.cache_resource
+def get_job_manager():
+    # One manager per app process, so the concurrency cap applies across all users
+    return JobManager(on_finish=get_result_cache().record_job)
+
+
+result_cache = get_result_cache()
+job_manager = get_job_manager()
+
 # Initialize session state
 if "analysis_complete" not in st.session_state:
     st.session_state.analysis_complete = False
 if "results_dir" not in st.session_state:
     st.session_state.results_dir = None
+if "job_id" not in st.session_state:
+    # Re-attach to the job in the URL after a browser refresh
+    st.session_state.job_id = st.query_params.get("job")
 
 # Header
 st.markdown("<h1 class='page-title'>🔬 Prognosis Marker</h1>", unsafe_allow_html=True)
@@ -421,15 +494,14 @@ with col1:
             st.info("✓ Example data loaded successfully")
 
     if uploaded_file:
-        # Preview data
-        df = pd.read_csv(uploaded_file)
+        # Preview data (header + first rows only)
+        preview_df, n_rows_total = read_preview(uploaded_file)
         file_name = (
             uploaded_file.name if hasattr(uploaded_file, "name") else str(uploaded_file)
         )
         st.success(f"✓ File loaded: {file_name}")
 
         with st.expander("📊 Data Preview"):
-            preview_df = df.head(10)
             try:
                 styled = preview_df.style.set_properties(
                     **{
@@ -465,9 +537,9 @@ with col1:
 
             col_a, col_b, col_c = st.columns(3)
             with col_a:
-                st.metric("Rows", df.shape[0])
+                st.metric("Rows", n_rows_total)
             with col_b:
-                st.metric("Columns", df.shape[1])
+                st.metric("Columns", preview_df.shape[1])
             with col_c:
                 # Handle file size for both uploaded and example files
                 if hasattr(uploaded_file, "size"):
@@ -486,7 +558,7 @@ with col1:
 
         st.markdown("## ⚙️ 3. Configuration")
 
-        columns = df.columns.tolist()
+        columns = preview_df.columns.tolist()
 
         with st.form("analysis_config"):
             col_left, col_right = st.columns(2)
@@ -517,16 +589,19 @@ with col1:
                     max_value=1000,
                     step=10,
                 )
-                output_dir = st.text_input(
-                    "Output Directory",
-                    value=f"results/{analysis_type.lower().split()[0]}",
-                )
+                if analysis_type == "Binary Classification":
+                    engine_label = st.radio(
+                        "Engine",
+                        ["R (reference, with plots)", "NumPy (fast, no plots)"],
+                        help="The NumPy engine runs the same selection in seconds on small data; R stays the reference.",
+                    )
+                    engine = "numpy" if engine_label.startswith("NumPy") else "r"
+                else:
+                    engine = "r"
 
             submitted = st.form_submit_button("🚀 Start Analysis")
 
             if submitted:
-                # Save uploaded file temporarily
-                temp_dir = tempfile.mkdtemp()
                 # Handle both uploaded file and example file (Path object)
                 file_name = (
                     uploaded_file.name
@@ -535,234 +610,75 @@ with col1:
                 )
                 if isinstance(uploaded_file, Path):
                     file_name = uploaded_file.name
-                data_path = Path(temp_dir) / file_name
-                df.to_csv(data_path, index=False)
 
-                # Create config (workdir omitted - R will default to getwd())
-                config = {"data_file": str(data_path)}
-
-                if analysis_type == "Binary Classification":
-                    config["binary"] = {
-                        "data_file": str(data_path),
+                script_type = (
+                    "binary" if analysis_type == "Binary Classification" else "survival"
+                )
+                if script_type == "binary":
+                    settings = {
                         "sample_id": sample_id,
                         "outcome": outcome,
                         "time_variable": None if time_var == "None" else time_var,
                         "split_prop": split_prop,
                         "num_seed": num_seed,
-                        "output_dir": output_dir,
+                        "engine": engine,
                     }
                 else:
-                    config["survival"] = {
-                        "data_file": str(data_path),
+                    settings = {
                         "sample_id": sample_id,
                         "time_variable": time_var,
                         "event": outcome,
                         "horizon": horizon,
                         "split_prop": split_prop,
                         "num_seed": num_seed,
-                        "output_dir": output_dir,
                     }
 
-                # Save config
-                config_path = Path(temp_dir) / "config.yaml"
-                with open(config_path, "w") as f:
-                    yaml.dump(config, f)
-
-                # Run analysis
-                st.markdown("<hr/>", unsafe_allow_html=True)
-                st.markdown("### 🔄 Running Analysis...")
-
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                iteration_text = st.empty()
-
-                try:
-                    # Determine which script to run
-                    script_type = (
-                        "binary"
-                        if analysis_type == "Binary Classification"
-                        else "survival"
-                    )
+                # Same data bytes + same settings -> same cache entry
+                key = cache_key(uploaded_file, {"mode": script_type, script_type: settings})
+                cached_output = result_cache.lookup(key)
+                active_job = job_manager.find_active(key)
+                if cached_output is not None:
+                    st.session_state.job_id = None
+                    st.session_state.analysis_complete = True
+                    st.session_state.results_dir = str(cached_output)
+                    st.session_state.served_from_cache = True
+                    st.query_params.clear()
+                    st.rerun()
+                elif active_job is not None:
+                    # An identical analysis is already queued or running; follow it
+                    job_id = active_job
+                else:
+                    # Absolute paths: the R process (or worker) may run from another directory
+                    data_path = result_cache.store_data(key, file_name, uploaded_file).resolve()
+                    output_dir = result_cache.output_dir(key).resolve()
 
-                    status_text.text("Starting R script...")
-
-                    # Run pixi command with real-time output
-                    import re
-                    import threading
-                    import queue
-
-                    process = subprocess.Popen(
-                        [
-                            "pixi",
-                            "run",
-                            script_type,
-                            "--",
-                            "--config",
-                            str(config_path),
-                        ],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True,
-                        bufsize=1,
-                        universal_newlines=True,
+                    # Create config (workdir omitted - R will default to getwd())
+                    config = {
+                        "data_file": str(data_path),
+                        script_type: dict(
+                            settings, data_file=str(data_path), output_dir=str(output_dir)
+                        ),
+                    }
+                    config_path = result_cache.entry_dir(key) / "config.yaml"
+                    with open(config_path, "w") as f:
+                        yaml.dump(config, f)
+
+                    # Queue the analysis in the background; the Jobs section below tracks it
+                    job_id = job_manager.submit(
+                        script_type,
+                        config_path,
+                        output_dir,
+                        num_seed,
+                        label=f"{script_type} - {file_name}",
+                        cache_key=key,
+                        engine=engine,
                     )
-
-                    total_iterations = num_seed
-                    current_iteration = 0
-                    stderr_output = []
-                    start_time = time.time()
-                    timeout = 600  # 10 minutes
-                    stepwise_running = False
-
-                    # Queue for stderr output
-                    stderr_queue = queue.Queue()
-
-                    def read_stderr():
-                        for line in iter(process.stderr.readline, ""):
-                            stderr_queue.put(line)
-                        process.stderr.close()
-
-                    # Start stderr reader thread
-                    stderr_thread = threading.Thread(target=read_stderr)
-                    stderr_thread.daemon = True
-                    stderr_thread.start()
-
-                    # Read stderr output in real-time
-                    while True:
-                        # Check timeout
-                        if time.time() - start_time > timeout:
-                            process.kill()
-                            raise subprocess.TimeoutExpired(process.args, timeout)
-
-                        # Check if process is done
-                        if process.poll() is not None:
-                            # Read remaining items from queue
-                            while not stderr_queue.empty():
-                                try:
-                                    line = stderr_queue.get_nowait()
-                                    stderr_output.append(line)
-
-                                    # Check for progress markers
-                                    if "PROGRESS_START:" in line:
-                                        match = re.search(r"PROGRESS_START:(\d+)", line)
-                                        if match:
-                                            total_iterations = int(match.group(1))
-                                    elif "STEPWISE_START" in line:
-                                        stepwise_running = True
-                                        status_text.text(
-                                            f"🔍 Step 1/2: Stepwise selection (finding best variables)..."
-                                        )
-                                        iteration_text.text(
-                                            f"⏳ This step performs ~{len(df.columns) * total_iterations} model evaluations and may take 5-15 minutes..."
-                                        )
-                                    elif "STEPWISE_LOG:" in line:
-                                        # Extract and display detailed stepwise log
-                                        log_msg = line.split("STEPWISE_LOG:", 1)[1].strip()
-                                        iteration_text.text(f"📝 {log_msg}")
-                                    elif "STEPWISE_DONE" in line:
-                                        stepwise_running = False
-                                        status_text.text(
-                                            f"✓ Step 1/2 complete! Starting iterations..."
-                                        )
-                                        iteration_text.text(
-                                            f"🚀 Running {total_iterations} iterations (much faster)..."
-                                        )
-                                    elif "PROGRESS:" in line:
-                                        match = re.search(r"PROGRESS:(\d+)", line)
-                                        if match:
-                                            current_iteration = int(match.group(1))
-                                            progress = min(
-                                                int((current_iteration / total_iterations) * 100),
-                                                100
-                                            )
-                                            progress_bar.progress(progress)
-                                            status_text.text(
-                                                f"🔄 Step 2/2: Running iterations ({current_iteration}/{total_iterations})..."
-                                            )
-                                            iteration_text.text(
-                                                f"📊 Progress: {progress}% complete"
-                                            )
-                                except queue.Empty:
-                                    break
-                            break
-
-                        # Try to get line from queue (non-blocking)
-                        try:
-                            line = stderr_queue.get(timeout=0.1)
-                            stderr_output.append(line)
-
-                            # Check for progress markers
-                            if "PROGRESS_START:" in line:
-                                match = re.search(r"PROGRESS_START:(\d+)", line)
-                                if match:
-                                    total_iterations = int(match.group(1))
-                            elif "STEPWISE_START" in line:
-                                stepwise_running = True
-                                status_text.text(
-                                    f"🔍 Step 1/2: Stepwise selection (finding best variables)..."
-                                )
-                                iteration_text.text(
-                                    f"⏳ This step performs ~{len(df.columns) * total_iterations} model evaluations and may take 5-15 minutes..."
-                                )
-                            elif "STEPWISE_LOG:" in line:
-                                # Extract and display detailed stepwise log
-                                log_msg = line.split("STEPWISE_LOG:", 1)[1].strip()
-                                iteration_text.text(f"📝 {log_msg}")
-                            elif "STEPWISE_DONE" in line:
-                                stepwise_running = False
-                                status_text.text(
-                                    f"✓ Step 1/2 complete! Starting iterations..."
-                                )
-                                iteration_text.text(
-                                    f"🚀 Running {total_iterations} iterations (much faster)..."
-                                )
-                            elif "PROGRESS:" in line:
-                                match = re.search(r"PROGRESS:(\d+)", line)
-                                if match:
-                                    current_iteration = int(match.group(1))
-                                    progress = min(
-                                        int((current_iteration / total_iterations) * 100),
-                                        100
-                                    )
-                                    progress_bar.progress(progress)
-                                    status_text.text(
-                                        f"Running iterations ({current_iteration}/{total_iterations})..."
-                                    )
-                                    iteration_text.text(
-                                        f"📊 Progress: {progress}% complete"
-                                    )
-                        except queue.Empty:
-                            continue
-
-                    # Wait for process to complete
-                    process.wait()
-
-                    if process.returncode == 0:
-                        progress_bar.progress(100)
-                        status_text.text("✓ Analysis completed!")
-                        iteration_text.text("✅ All iterations finished successfully!")
-
-                        st.session_state.analysis_complete = True
-                        st.session_state.results_dir = output_dir
-
-                        time.sleep(1)
-                        st.rerun()
-                    else:
-                        st.error("❌ Error occurred during analysis")
-                        if stderr_output:
-                            # Filter out PROGRESS lines from error output
-                            error_lines = [
-                                line
-                                for line in stderr_output
-                                if not line.startswith("PROGRESS")
-                            ]
-                            if error_lines:
-                                st.code("".join(error_lines), language="text")
-
-                except subprocess.TimeoutExpired:
-                    st.error("❌ Analysis timeout (10 minute limit)")
-                except Exception as e:
-                    st.error(f"❌ Error: {str(e)}")
+                st.session_state.job_id = job_id
+                st.session_state.analysis_complete = False
+                st.session_state.results_dir = None
+                st.session_state.served_from_cache = False
+                st.query_params["job"] = job_id
+                st.rerun()
 
 
 with col2:
@@ -824,10 +740,84 @@ with col2:
         """
         )
 
-    # Results section (outside col2 to use full width)
+# Jobs section: progress of the current job plus every queued/running/finished job
+current_job = (
+    job_manager.get(st.session_state.job_id) if st.session_state.job_id else None
+)
+all_jobs = job_manager.list_jobs()
+if current_job or all_jobs:
+    st.markdown("---")
+    st.markdown("## 🔄 Analysis Jobs")
+
+if current_job:
+    st.markdown(f"**{current_job['label']}** · job `{current_job['id']}`")
+    total = max(current_job["total_iterations"] or 1, 1)
+    if current_job["status"] == "queued":
+        position = job_manager.queue_position(current_job["id"])
+        st.progress(0)
+        st.info(f"⏳ Queued (position {position}) - waiting for a free analysis slot")
+    elif current_job["status"] == "running":
+        progress = min(int(current_job["current_iteration"] / total * 100), 100)
+        st.progress(progress)
+        if current_job.get("progress_message"):
+            st.text(f"🔄 {current_job['progress_message']}")
+        st.text(f"📝 {current_job['message']}")
+        elapsed = time.time() - (current_job["started"] or time.time())
+        run_eta = current_job.get("run_eta_seconds")
+        if run_eta is None:
+            st.caption(f"Running for {format_duration(elapsed)}")
+        else:
+            st.caption(
+                f"Running for {format_duration(elapsed)} · at least ~{format_duration(run_eta)} "
+                "left at the current pace"
+            )
+        if JOB_TIMEOUT and run_eta is not None:
+            if elapsed + run_eta > JOB_TIMEOUT:
+                st.warning(
+                    f"⚠️ At the current pace the run needs at least ~{format_duration(run_eta)} more, "
+                    f"but the {format_duration(JOB_TIMEOUT)} job limit leaves "
+                    f"{format_duration(max(JOB_TIMEOUT - elapsed, 0))} - it will likely be stopped"
+                )
+            else:
+                st.caption(f"Job limit {format_duration(JOB_TIMEOUT)}: {format_duration(JOB_TIMEOUT - elapsed)} left")
+    elif current_job["status"] == "completed":
+        st.progress(100)
+        st.success("✓ Analysis completed!")
+        if not st.session_state.analysis_complete:
+            st.session_state.analysis_complete = True
+            st.session_state.results_dir = current_job["output_dir"]
+    else:
+        st.error(f"❌ {current_job['message']} ({current_job['status']})")
+        log_tail = job_manager.log_tail(current_job["id"])
+        if log_tail:
+            st.code(log_tail, language="text")
+
+    if current_job["status"] in ("queued", "running"):
+        if st.button("⏹ Cancel Job", key="cancel_job"):
+            job_manager.cancel(current_job["id"])
+            st.rerun()
+
+if all_jobs:
+    with st.expander(f"📋 All jobs ({len(all_jobs)})"):
+        for job in all_jobs:
+            job_col, status_col, open_col = st.columns([4, 2, 1])
+            job_col.text(f"{job['label']} ({job['id']})")
+            status_col.text(job["status"])
+            if job["id"] != st.session_state.job_id and open_col.button(
+                "Open", key=f"open_{job['id']}"
+            ):
+                st.session_state.job_id = job["id"]
+                st.session_state.analysis_complete = False
+                st.session_state.results_dir = None
+                st.query_params["job"] = job["id"]
+                st.rerun()
+
+# Results section (outside col2 to use full width)
 if st.session_state.analysis_complete and st.session_state.results_dir:
     st.markdown("---")
     st.markdown("## 📊 Analysis Results")
+    if st.session_state.get("served_from_cache"):
+        st.info("♻️ Identical data and settings were analysed before - showing the stored results")
 
     results_dir = Path(st.session_state.results_dir)
 
@@ -899,6 +889,8 @@ if st.session_state.analysis_complete and st.session_state.results_dir:
         if st.button("🔄 Start New Analysis"):
             st.session_state.analysis_complete = False
             st.session_state.results_dir = None
+            st.session_state.job_id = None
+            st.query_params.clear()
             if "example_loaded" in st.session_state:
                 del st.session_state.example_loaded
             st.rerun()
@@ -920,3 +912,8 @@ st.markdown(
     """,
     unsafe_allow_html=True,
 )
+
+# Refresh while the current job is queued or running (the job itself runs in the background)
+if current_job and current_job["status"] in ("queued", "running"):
+    time.sleep(2)
+    st.rerun()
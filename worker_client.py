@@ -0,0 +1,196 @@
+"""
+Client for the long-lived R worker (R_Worker.R).
+
+When PROMISE_WORKER_PORT is set and a worker is listening, analyses are sent to the
+warm R session instead of starting `pixi run binary|survival` for every job.
+`start_analysis` returns an object with the same surface the callers use from
+subprocess.Popen (stderr.readline, poll, wait, kill, returncode, args), so progress
+parsing is unchanged.
+
+Requests are authenticated with the worker's token: PROMISE_WORKER_TOKEN, or the file
+~/.promise_worker_<port>.token the worker writes when that variable is unset.
+
+Usage:
+    pixi run worker                          # start the worker (default port 6390)
+    PROMISE_WORKER_PORT=6390 python3 worker_client.py binary config/example_analysis.yaml
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+CONNECT_TIMEOUT = 2.0
+
+
+def worker_address():
+    """(host, port) of the configured worker, or None if PROMISE_WORKER_PORT is unset."""
+    port = os.environ.get("PROMISE_WORKER_PORT")
+    if not port:
+        return None
+    return os.environ.get("PROMISE_WORKER_HOST", "127.0.0.1"), int(port)
+
+
+def worker_token(port):
+    token = os.environ.get("PROMISE_WORKER_TOKEN")
+    if token:
+        return token
+    token_file = Path.home() / f".promise_worker_{port}.token"
+    return token_file.read_text().strip() if token_file.exists() else ""
+
+
+def worker_request(address, request, timeout=CONNECT_TIMEOUT):
+    """Send one request line and return the connected socket (reply not yet read)."""
+    sock = socket.create_connection(address, timeout=timeout)
+    sock.sendall(f"AUTH {worker_token(address[1])}\n{request}\n".encode("utf-8"))
+    return sock
+
+
+class WorkerJob:
+    """A job running in the R worker, exposed like a subprocess.Popen."""
+
+    def __init__(self, mode, config_path, address):
+        self.args = ["R_Worker", mode, str(config_path)]
+        self.returncode = None
+        self.pid = None
+        self._address = address
+        self._sock = worker_request(address, f"RUN {mode} {Path(config_path).resolve()}")
+        # Lines are split from a byte buffer here rather than through makefile(): a socket
+        # timeout in wait(timeout) then leaves the connection readable
+        self._buffer = b""
+        self.stderr = self
+
+    def _recv_line(self, timeout):
+        while b"\n" not in self._buffer:
+            self._sock.settimeout(timeout)
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                return ""
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line.decode("utf-8", errors="replace") + "\n"
+
+    def _read_line(self, timeout=None):
+        """Next log line, "" once the job has ended; socket.timeout propagates."""
+        if self.returncode is not None:
+            return ""
+        try:
+            line = self._recv_line(timeout)
+        except socket.timeout:
+            raise
+        except OSError:
+            line = ""
+        if not line:
+            # Connection dropped before the worker reported an exit status
+            self.returncode = 1
+            return ""
+        if line.startswith("WORKER_DONE"):
+            parts = line.split()
+            self.returncode = int(parts[1]) if len(parts) > 1 else 1
+            return ""
+        if line.startswith("WORKER_JOB"):
+            # PID of the forked job, used by kill()
+            self.pid = int(line.split()[1])
+            return self._read_line(timeout)
+        return line
+
+    def readline(self):
+        return self._read_line()
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.returncode is None:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            try:
+                self._read_line(remaining)
+            except socket.timeout:
+                raise subprocess.TimeoutExpired(self.args, timeout) from None
+        return self.returncode
+
+    def kill(self):
+        # Ask the worker to kill the forked job so its slot frees up now; closing the connection
+        # alone would only stop a job that has not started yet or on its next write
+        if self.pid is not None and self.returncode is None:
+            try:
+                with worker_request(self._address, f"CANCEL {self.pid}") as sock:
+                    sock.recv(256)
+            except OSError:
+                pass
+        self.close()
+        if self.returncode is None:
+            self.returncode = -9
+
+    def close(self):
+        try:
+            # shutdown() also wakes a readline() blocked in another thread (job_manager's watchdog)
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+
+def start_analysis(mode, config_path, engine="r"):
+    """Start a binary/survival analysis on the R worker if one is reachable, else via pixi.
+
+    engine="numpy" runs a binary analysis with fast_engine.py in a plain Python process.
+    """
+    if engine == "numpy":
+        if mode != "binary":
+            raise ValueError("The NumPy engine only supports binary analyses")
+        return subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve().parent / "fast_engine.py"), "--config", str(config_path)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            universal_newlines=True,
+            start_new_session=True,
+        )
+    address = worker_address()
+    if address is not None:
+        try:
+            return WorkerJob(mode, config_path, address)
+        except OSError:
+            pass
+    return subprocess.Popen(
+        ["pixi", "run", mode, "--", "--config", str(config_path)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+        universal_newlines=True,
+        # Own process group, so job_manager can kill pixi together with the R process it starts
+        start_new_session=True,
+    )
+
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[1] not in ("binary", "survival"):
+        print("Usage: python3 worker_client.py binary|survival <config.yaml>", file=sys.stderr)
+        return 2
+    mode, config_path = sys.argv[1], sys.argv[2]
+    address = worker_address()
+    try:
+        job = WorkerJob(mode, config_path, address) if address else None
+    except OSError:
+        job = None
+    if job is None:
+        return subprocess.call(["pixi", "run", mode, "--", "--config", config_path])
+    for line in iter(job.stderr.readline, ""):
+        sys.stderr.write(line)
+        sys.stderr.flush()
+    return job.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())